@@ -1,20 +1,33 @@
+import asyncio
 import base64
+import email.utils
+import inspect
+import random
+import threading
+import time
 import urllib.parse
 import uuid
-from httpx import Request, HTTPStatusError
-from tenacity import (
-    retry,
-    wait_exponential_jitter,
-    stop_after_attempt,
-    retry_if_exception,
+import weakref
+from contextvars import ContextVar
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from functools import partial, wraps
+import httpx
+from httpx import (
+    HTTPStatusError,
+    Limits,
+    Request,
+    Response,
+    URL,
 )
-from typing import Any, Optional, Tuple, List, Union, Dict, Callable
+from typing import Any, Optional, Tuple, List, Union, Dict, Callable, TypeVar
 
-from llama_index.core.async_utils import run_jobs
+from llama_index.core.async_utils import DEFAULT_NUM_WORKERS, run_jobs
 from llama_index.core.schema import NodeWithScore, ImageNode
 from llama_cloud import (
     AutoTransformConfig,
+    PageFigureMetadata,
     PageFigureNodeWithScore,
+    PageScreenshotMetadata,
     PageScreenshotNodeWithScore,
     Pipeline,
     PipelineCreateTransformConfig,
@@ -22,31 +35,155 @@ from llama_cloud import (
     Project,
     Retriever,
 )
-from llama_cloud.core import remove_none_from_dict
 from llama_cloud.client import LlamaCloud, AsyncLlamaCloud
 from llama_cloud.core.api_error import ApiError
 
+T = TypeVar("T")
+
 DEPRECATION_REASON = "llama-index-indices-managed-llama-cloud has been moved to llama-cloud-services (https://github.com/run-llama/llama_cloud_services) as of llama-cloud-services v0.6.55, thus llama-index-indices-managed-llama-cloud package will be deprecated and no longer maintained. Check out the LlamaCloud documentation for more information: https://docs.cloud.llamaindex.ai"
 
 
-def is_retryable_http_error(exception):
-    # Retry for ApiError with 5xx status codes
+class _ResponseApiError(ApiError):
+    """ApiError that keeps the response headers, so Retry-After can be honored."""
+
+    def __init__(
+        self, *, status_code: Optional[int], body: Any, headers: httpx.Headers
+    ) -> None:
+        super().__init__(status_code=status_code, body=body)
+        self.headers = headers
+
+
+class _RetryBudget:
+    """Token bucket limiting how many retries may be issued across all calls."""
+
+    def __init__(self, capacity: float, refill_rate: float) -> None:
+        self._capacity = capacity
+        self._refill_rate = refill_rate
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._capacity,
+                self._tokens + (now - self._last_refill) * self._refill_rate,
+            )
+            self._last_refill = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+# Once the budget is spent (e.g. during an outage), failures surface immediately
+# instead of every caller piling on more retries.
+_retry_budget = _RetryBudget(capacity=50, refill_rate=5)
+
+_MAX_RETRY_WAIT = 10
+_RATE_LIMIT_MIN_WAIT = 2
+_MAX_RETRY_AFTER = 60
+
+
+def _get_status_code(exception: BaseException) -> Optional[int]:
     if isinstance(exception, ApiError):
-        return 500 <= exception.status_code < 600
-    # Also retry for HTTPError with 5xx status codes
+        return exception.status_code
     elif isinstance(exception, HTTPStatusError):
-        return 500 <= exception.response.status_code < 600
-    return False
+        return exception.response.status_code
+    return None
+
+
+def _get_retry_after(exception: BaseException) -> Optional[float]:
+    """Parse the Retry-After header (seconds or HTTP date), if the error carries one."""
+    if isinstance(exception, _ResponseApiError):
+        headers = exception.headers
+    elif isinstance(exception, HTTPStatusError):
+        headers = exception.response.headers
+    else:
+        return None
+    retry_after = headers.get("Retry-After")
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def is_retryable_http_error(exception):
+    # Retry for 429 and 5xx status codes
+    status_code = _get_status_code(exception)
+    if status_code is None:
+        return False
+    return status_code == 429 or 500 <= status_code < 600
+
+
+_MAX_RETRY_ATTEMPTS = 5
+
+# Set by _run_threaded_jobs in its workers, so a failed fan-out can stop the
+# retries of fetches that are still running.
+_retry_cancelled: ContextVar[Optional[threading.Event]] = ContextVar(
+    "_retry_cancelled", default=None
+)
+
+
+def _get_retry_wait(exception: BaseException, attempt_number: int) -> float:
+    """Full jitter backoff, honoring Retry-After and waiting longer on 429s."""
+    retry_after = _get_retry_after(exception)
+    if retry_after is not None:
+        return min(retry_after, _MAX_RETRY_AFTER)
+
+    delay = random.uniform(0, min(_MAX_RETRY_WAIT, 2**attempt_number))
+    if _get_status_code(exception) == 429:
+        delay = max(delay, _RATE_LIMIT_MIN_WAIT)
+    return delay
 
 
 def retry_on_failure(func: Callable) -> Callable:
-    """Decorator to apply tenacity retry with exponential backoff and jitter for 5xx errors."""
-    return retry(
-        wait=wait_exponential_jitter(exp_base=2, max=10),
-        stop=stop_after_attempt(5),
-        retry=retry_if_exception(is_retryable_http_error),
-        reraise=True,
-    )(func)
+    """Decorator to retry 429 and 5xx errors with full-jitter backoff."""
+    # hand-rolled rather than tenacity, so the success path is a plain call
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            for attempt_number in range(1, _MAX_RETRY_ATTEMPTS):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    if not (is_retryable_http_error(e) and _retry_budget.try_acquire()):
+                        raise
+                    await asyncio.sleep(_get_retry_wait(e, attempt_number))
+            return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        cancelled = _retry_cancelled.get()
+        for attempt_number in range(1, _MAX_RETRY_ATTEMPTS):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if (
+                    not is_retryable_http_error(e)
+                    or (cancelled is not None and cancelled.is_set())
+                    or not _retry_budget.try_acquire()
+                ):
+                    raise
+                delay = _get_retry_wait(e, attempt_number)
+                if cancelled is None:
+                    time.sleep(delay)
+                elif cancelled.wait(delay):
+                    raise
+        return func(*args, **kwargs)
+
+    return wrapper
 
 
 def default_transform_config() -> PipelineCreateTransformConfig:
@@ -139,9 +276,34 @@ def resolve_project_and_pipeline(
 ) -> Tuple[Project, Pipeline]:
     # resolve pipeline by ID
     if pipeline_id is not None:
-        pipeline = resolve_pipeline(
-            client, pipeline_id=pipeline_id, project=None, pipeline_name=None
-        )
+        if project_id is not None:
+            # both are ID-addressable, so look them up concurrently; the
+            # pipeline's own project wins if the given project_id can't be used
+            def _resolve_given_project() -> Optional[Project]:
+                try:
+                    return resolve_project(
+                        client, project_name, project_id, organization_id
+                    )
+                except Exception:
+                    return None
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                pipeline_future = executor.submit(
+                    resolve_pipeline,
+                    client,
+                    pipeline_id=pipeline_id,
+                    project=None,
+                    pipeline_name=None,
+                )
+                project_future = executor.submit(_resolve_given_project)
+                pipeline = pipeline_future.result()
+                given_project = project_future.result()
+            if given_project is not None and given_project.id == pipeline.project_id:
+                return given_project, pipeline
+        else:
+            pipeline = resolve_pipeline(
+                client, pipeline_id=pipeline_id, project=None, pipeline_name=None
+            )
         project_id = pipeline.project_id
 
     # resolve project
@@ -156,20 +318,76 @@ def resolve_project_and_pipeline(
     return project, pipeline
 
 
+# httpx's default pool sizes already cover the DEFAULT_NUM_WORKERS-wide page
+# image fan-out. Idle connections are kept for 30s instead of 5s, so the
+# fetches of the next query reuse TCP+TLS connections to the same host.
+_HTTPX_LIMITS = Limits(
+    max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0
+)
+
+
+def default_httpx_client(
+    timeout: Optional[float] = 60, http2: bool = False
+) -> httpx.Client:
+    """
+    Build the httpx client used when the caller doesn't provide one.
+
+    HTTP/2 (which requires the `h2` package) lets the page image fan-out
+    multiplex over a single connection per host; it is only enabled on request.
+    """
+    return httpx.Client(timeout=timeout, limits=_HTTPX_LIMITS, http2=http2)
+
+
+def default_async_httpx_client(
+    timeout: Optional[float] = 60, http2: bool = False
+) -> httpx.AsyncClient:
+    """Build the async httpx client used when the caller doesn't provide one."""
+    return httpx.AsyncClient(timeout=timeout, limits=_HTTPX_LIMITS, http2=http2)
+
+
+# client -> (parsed base URL, static headers or None)
+_request_bases: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _get_request_base(
+    client: Union[LlamaCloud, AsyncLlamaCloud],
+) -> Tuple[URL, Dict[str, str]]:
+    """Get the parsed base URL (path ending in a slash) and headers for a client, cached per client."""
+    cached = _request_bases.get(client)
+    if cached is None:
+        client_wrapper = client._client_wrapper
+        # headers built from a token callable may change, so only cache static ones
+        headers = (
+            None if callable(client_wrapper._token) else client_wrapper.get_headers()
+        )
+        cached = (URL(f"{client_wrapper.get_base_url().rstrip('/')}/"), headers)
+        _request_bases[client] = cached
+
+    base_url, headers = cached
+    if headers is None:
+        headers = client._client_wrapper.get_headers()
+    return base_url, headers
+
+
+def _quote(path_segment: str) -> str:
+    # httpx rejects raw "?" and "#" in a path, so encode every reserved character
+    return urllib.parse.quote(path_segment, safe="")
+
+
 def _build_get_page_screenshot_request(
     client: Union[LlamaCloud, AsyncLlamaCloud],
     file_id: str,
     page_index: int,
     project_id: str,
 ) -> Request:
+    base_url, headers = _get_request_base(client)
     return client._client_wrapper.httpx_client.build_request(
         "GET",
-        urllib.parse.urljoin(
-            f"{client._client_wrapper.get_base_url()}/",
-            f"api/v1/files/{file_id}/page_screenshots/{page_index}",
+        base_url.copy_with(
+            path=f"{base_url.path}api/v1/files/{_quote(file_id)}/page_screenshots/{page_index}",
+            params={"project_id": project_id},
         ),
-        params=remove_none_from_dict({"project_id": project_id}),
-        headers=client._client_wrapper.get_headers(),
+        headers=headers,
         timeout=60,
     )
 
@@ -181,32 +399,87 @@ def _build_get_page_figure_request(
     figure_name: str,
     project_id: str,
 ) -> Request:
+    base_url, headers = _get_request_base(client)
     return client._client_wrapper.httpx_client.build_request(
         "GET",
-        urllib.parse.urljoin(
-            f"{client._client_wrapper.get_base_url()}/",
-            f"api/v1/files/{file_id}/page-figures/{page_index}/{figure_name}",
+        base_url.copy_with(
+            path=f"{base_url.path}api/v1/files/{_quote(file_id)}/page-figures/{page_index}/{_quote(figure_name)}",
+            params={"project_id": project_id},
         ),
-        params=remove_none_from_dict({"project_id": project_id}),
-        headers=client._client_wrapper.get_headers(),
+        headers=headers,
         timeout=60,
     )
 
 
+_STREAM_CHUNK_SIZE = 65536
+
+
+class _Base64StreamEncoder:
+    """Base64-encode a byte stream incrementally, without buffering the raw payload."""
+
+    def __init__(self) -> None:
+        self._encoded = bytearray()
+        self._remainder = b""
+
+    def update(self, chunk: bytes) -> None:
+        data = self._remainder + chunk
+        # only encode whole 3-byte groups so no padding is emitted mid-stream
+        cutoff = len(data) - len(data) % 3
+        self._encoded += base64.b64encode(data[:cutoff])
+        self._remainder = data[cutoff:]
+
+    def finalize(self) -> str:
+        self._encoded += base64.b64encode(self._remainder)
+        self._remainder = b""
+        return self._encoded.decode("ascii")
+
+
+_MAX_ERROR_BODY_SIZE = 4096
+
+
+def _read_error_body(response: Response) -> str:
+    """Read at most _MAX_ERROR_BODY_SIZE bytes of an error response for reporting."""
+    body = bytearray()
+    for chunk in response.iter_bytes():
+        body += chunk
+        if len(body) >= _MAX_ERROR_BODY_SIZE:
+            break
+    return body[:_MAX_ERROR_BODY_SIZE].decode("utf-8", errors="replace")
+
+
+async def _aread_error_body(response: Response) -> str:
+    """Read at most _MAX_ERROR_BODY_SIZE bytes of an error response for reporting (async)."""
+    body = bytearray()
+    async for chunk in response.aiter_bytes():
+        body += chunk
+        if len(body) >= _MAX_ERROR_BODY_SIZE:
+            break
+    return body[:_MAX_ERROR_BODY_SIZE].decode("utf-8", errors="replace")
+
+
 @retry_on_failure
 def get_page_screenshot(
     client: LlamaCloud, file_id: str, page_index: int, project_id: str
 ) -> str:
-    """Get the page screenshot."""
+    """Get the page screenshot as a base64-encoded string."""
     # TODO: this currently uses requests, should be replaced with the client
     request = _build_get_page_screenshot_request(
         client, file_id, page_index, project_id
     )
-    _response = client._client_wrapper.httpx_client.send(request)
-    if 200 <= _response.status_code < 300:
-        return _response.content
-    else:
-        raise ApiError(status_code=_response.status_code, body=_response.text)
+    _response = client._client_wrapper.httpx_client.send(request, stream=True)
+    try:
+        if 200 <= _response.status_code < 300:
+            encoder = _Base64StreamEncoder()
+            for chunk in _response.iter_bytes(chunk_size=_STREAM_CHUNK_SIZE):
+                encoder.update(chunk)
+            return encoder.finalize()
+        raise _ResponseApiError(
+            status_code=_response.status_code,
+            body=_read_error_body(_response),
+            headers=_response.headers,
+        )
+    finally:
+        _response.close()
 
 
 @retry_on_failure
@@ -216,26 +489,44 @@ def get_page_figure(
     request = _build_get_page_figure_request(
         client, file_id, page_index, figure_name, project_id
     )
-    _response = client._client_wrapper.httpx_client.send(request)
-    if 200 <= _response.status_code < 300:
-        return _response.content
-    else:
-        raise ApiError(status_code=_response.status_code, body=_response.text)
+    _response = client._client_wrapper.httpx_client.send(request, stream=True)
+    try:
+        if 200 <= _response.status_code < 300:
+            encoder = _Base64StreamEncoder()
+            for chunk in _response.iter_bytes(chunk_size=_STREAM_CHUNK_SIZE):
+                encoder.update(chunk)
+            return encoder.finalize()
+        raise _ResponseApiError(
+            status_code=_response.status_code,
+            body=_read_error_body(_response),
+            headers=_response.headers,
+        )
+    finally:
+        _response.close()
 
 
 @retry_on_failure
 async def aget_page_screenshot(
     client: AsyncLlamaCloud, file_id: str, page_index: int, project_id: str
 ) -> str:
-    """Get the page screenshot (async)."""
+    """Get the page screenshot as a base64-encoded string (async)."""
     request = _build_get_page_screenshot_request(
         client, file_id, page_index, project_id
     )
-    _response = await client._client_wrapper.httpx_client.send(request)
-    if 200 <= _response.status_code < 300:
-        return _response.content
-    else:
-        raise ApiError(status_code=_response.status_code, body=_response.text)
+    _response = await client._client_wrapper.httpx_client.send(request, stream=True)
+    try:
+        if 200 <= _response.status_code < 300:
+            encoder = _Base64StreamEncoder()
+            async for chunk in _response.aiter_bytes(chunk_size=_STREAM_CHUNK_SIZE):
+                encoder.update(chunk)
+            return encoder.finalize()
+        raise _ResponseApiError(
+            status_code=_response.status_code,
+            body=await _aread_error_body(_response),
+            headers=_response.headers,
+        )
+    finally:
+        await _response.aclose()
 
 
 @retry_on_failure
@@ -249,11 +540,67 @@ async def aget_page_figure(
     request = _build_get_page_figure_request(
         client, file_id, page_index, figure_name, project_id
     )
-    _response = await client._client_wrapper.httpx_client.send(request)
-    if 200 <= _response.status_code < 300:
-        return _response.content
-    else:
-        raise ApiError(status_code=_response.status_code, body=_response.text)
+    _response = await client._client_wrapper.httpx_client.send(request, stream=True)
+    try:
+        if 200 <= _response.status_code < 300:
+            encoder = _Base64StreamEncoder()
+            async for chunk in _response.aiter_bytes(chunk_size=_STREAM_CHUNK_SIZE):
+                encoder.update(chunk)
+            return encoder.finalize()
+        raise _ResponseApiError(
+            status_code=_response.status_code,
+            body=await _aread_error_body(_response),
+            headers=_response.headers,
+        )
+    finally:
+        await _response.aclose()
+
+
+def _page_screenshot_metadata(node: PageScreenshotMetadata) -> Dict[str, Any]:
+    metadata = node.metadata.copy() if node.metadata else {}
+    metadata["file_id"] = node.file_id
+    metadata["page_index"] = node.page_index
+    return metadata
+
+
+def _page_figure_metadata(node: PageFigureMetadata) -> Dict[str, Any]:
+    metadata = node.metadata.copy() if node.metadata else {}
+    metadata["file_id"] = node.file_id
+    metadata["page_index"] = node.page_index
+    metadata["figure_name"] = node.figure_name
+    return metadata
+
+
+def _run_threaded_jobs(
+    jobs: List[Callable[[], T]], workers: int = DEFAULT_NUM_WORKERS
+) -> List[T]:
+    """
+    Run blocking jobs concurrently in a thread pool, returning results in order.
+
+    Uses the same default concurrency as run_jobs. On the first failure, jobs
+    that haven't started are cancelled, running jobs stop retrying, and the
+    error is raised once the requests already in flight have returned.
+    """
+    cancelled = threading.Event()
+
+    def run(job: Callable[[], T]) -> T:
+        token = _retry_cancelled.set(cancelled)
+        try:
+            return job()
+        finally:
+            _retry_cancelled.reset(token)
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        futures = [executor.submit(run, job) for job in jobs]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in futures:
+            error = future.exception() if future in done else None
+            if error is not None:
+                cancelled.set()
+                for pending in futures:
+                    pending.cancel()
+                raise error
+        return [future.result() for future in futures]
 
 
 def page_screenshot_nodes_to_node_with_score(
@@ -264,27 +611,34 @@ def page_screenshot_nodes_to_node_with_score(
     if not raw_image_nodes:
         return []
 
-    image_nodes = []
-    for raw_image_node in raw_image_nodes:
-        image_bytes = get_page_screenshot(
+    # several nodes often point at the same page, so fetch each one only once
+    keys = [
+        (raw_image_node.node.file_id, raw_image_node.node.page_index)
+        for raw_image_node in raw_image_nodes
+    ]
+    unique_keys = list(dict.fromkeys(keys))
+    jobs = [
+        partial(
+            get_page_screenshot,
             client=client,
-            file_id=raw_image_node.node.file_id,
-            page_index=raw_image_node.node.page_index,
+            file_id=file_id,
+            page_index=page_index,
             project_id=project_id,
         )
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-        image_node_metadata: Dict[str, Any] = {
-            **(raw_image_node.node.metadata or {}),
-            "file_id": raw_image_node.node.file_id,
-            "page_index": raw_image_node.node.page_index,
-        }
-        image_node_with_score = NodeWithScore(
-            node=ImageNode(image=image_base64, metadata=image_node_metadata),
+        for file_id, page_index in unique_keys
+    ]
+
+    image_base64_by_key = dict(zip(unique_keys, _run_threaded_jobs(jobs)))
+    return [
+        NodeWithScore(
+            node=ImageNode(
+                image=image_base64_by_key[key],
+                metadata=_page_screenshot_metadata(raw_image_node.node),
+            ),
             score=raw_image_node.score,
         )
-        image_nodes.append(image_node_with_score)
-
-    return image_nodes
+        for key, raw_image_node in zip(keys, raw_image_nodes)
+    ]
 
 
 def image_nodes_to_node_with_score(
@@ -311,28 +665,39 @@ def page_figure_nodes_to_node_with_score(
     if not raw_figure_nodes:
         return []
 
-    figure_nodes = []
-    for raw_figure_node in raw_figure_nodes:
-        figure_bytes = get_page_figure(
+    # the same figure can be hit by several nodes, so fetch each one only once
+    keys = [
+        (
+            raw_figure_node.node.file_id,
+            raw_figure_node.node.page_index,
+            raw_figure_node.node.figure_name,
+        )
+        for raw_figure_node in raw_figure_nodes
+    ]
+    unique_keys = list(dict.fromkeys(keys))
+    jobs = [
+        partial(
+            get_page_figure,
             client=client,
-            file_id=raw_figure_node.node.file_id,
-            page_index=raw_figure_node.node.page_index,
-            figure_name=raw_figure_node.node.figure_name,
+            file_id=file_id,
+            page_index=page_index,
+            figure_name=figure_name,
             project_id=project_id,
         )
-        figure_base64 = base64.b64encode(figure_bytes).decode("utf-8")
-        figure_node_metadata: Dict[str, Any] = {
-            **(raw_figure_node.node.metadata or {}),
-            "file_id": raw_figure_node.node.file_id,
-            "page_index": raw_figure_node.node.page_index,
-            "figure_name": raw_figure_node.node.figure_name,
-        }
-        figure_node_with_score = NodeWithScore(
-            node=ImageNode(image=figure_base64, metadata=figure_node_metadata),
+        for file_id, page_index, figure_name in unique_keys
+    ]
+
+    figure_base64_by_key = dict(zip(unique_keys, _run_threaded_jobs(jobs)))
+    return [
+        NodeWithScore(
+            node=ImageNode(
+                image=figure_base64_by_key[key],
+                metadata=_page_figure_metadata(raw_figure_node.node),
+            ),
             score=raw_figure_node.score,
         )
-        figure_nodes.append(figure_node_with_score)
-    return figure_nodes
+        for key, raw_figure_node in zip(keys, raw_figure_nodes)
+    ]
 
 
 async def apage_screenshot_nodes_to_node_with_score(
@@ -343,31 +708,33 @@ async def apage_screenshot_nodes_to_node_with_score(
     if not raw_image_nodes:
         return []
 
-    image_nodes = []
+    # several nodes often point at the same page, so fetch each one only once
+    keys = [
+        (raw_image_node.node.file_id, raw_image_node.node.page_index)
+        for raw_image_node in raw_image_nodes
+    ]
+    unique_keys = list(dict.fromkeys(keys))
     tasks = [
         aget_page_screenshot(
             client=client,
-            file_id=raw_image_node.node.file_id,
-            page_index=raw_image_node.node.page_index,
+            file_id=file_id,
+            page_index=page_index,
             project_id=project_id,
         )
-        for raw_image_node in raw_image_nodes
+        for file_id, page_index in unique_keys
     ]
 
-    image_bytes_list = await run_jobs(tasks)
-    for image_bytes, raw_image_node in zip(image_bytes_list, raw_image_nodes):
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-        image_node_metadata: Dict[str, Any] = {
-            **(raw_image_node.node.metadata or {}),
-            "file_id": raw_image_node.node.file_id,
-            "page_index": raw_image_node.node.page_index,
-        }
-        image_node_with_score = NodeWithScore(
-            node=ImageNode(image=image_base64, metadata=image_node_metadata),
+    image_base64_by_key = dict(zip(unique_keys, await run_jobs(tasks)))
+    return [
+        NodeWithScore(
+            node=ImageNode(
+                image=image_base64_by_key[key],
+                metadata=_page_screenshot_metadata(raw_image_node.node),
+            ),
             score=raw_image_node.score,
         )
-        image_nodes.append(image_node_with_score)
-    return image_nodes
+        for key, raw_image_node in zip(keys, raw_image_nodes)
+    ]
 
 
 async def aimage_nodes_to_node_with_score(
@@ -394,31 +761,35 @@ async def apage_figure_nodes_to_node_with_score(
     if not raw_figure_nodes:
         return []
 
-    figure_nodes = []
+    # the same figure can be hit by several nodes, so fetch each one only once
+    keys = [
+        (
+            raw_figure_node.node.file_id,
+            raw_figure_node.node.page_index,
+            raw_figure_node.node.figure_name,
+        )
+        for raw_figure_node in raw_figure_nodes
+    ]
+    unique_keys = list(dict.fromkeys(keys))
     tasks = [
         aget_page_figure(
             client=client,
-            file_id=raw_figure_node.node.file_id,
-            page_index=raw_figure_node.node.page_index,
-            figure_name=raw_figure_node.node.figure_name,
+            file_id=file_id,
+            page_index=page_index,
+            figure_name=figure_name,
             project_id=project_id,
         )
-        for raw_figure_node in raw_figure_nodes
+        for file_id, page_index, figure_name in unique_keys
     ]
 
-    figure_bytes_list = await run_jobs(tasks)
-    for figure_bytes, raw_figure_node in zip(figure_bytes_list, raw_figure_nodes):
-        figure_base64 = base64.b64encode(figure_bytes).decode("utf-8")
-        figure_node_metadata: Dict[str, Any] = {
-            **(raw_figure_node.node.metadata or {}),
-            "file_id": raw_figure_node.node.file_id,
-            "page_index": raw_figure_node.node.page_index,
-            "figure_name": raw_figure_node.node.figure_name,
-        }
-        figure_node_with_score = NodeWithScore(
-            node=ImageNode(image=figure_base64, metadata=figure_node_metadata),
+    figure_base64_by_key = dict(zip(unique_keys, await run_jobs(tasks)))
+    return [
+        NodeWithScore(
+            node=ImageNode(
+                image=figure_base64_by_key[key],
+                metadata=_page_figure_metadata(raw_figure_node.node),
+            ),
             score=raw_figure_node.score,
         )
-        figure_nodes.append(figure_node_with_score)
-
-    return figure_nodes
+        for key, raw_figure_node in zip(keys, raw_figure_nodes)
+    ]
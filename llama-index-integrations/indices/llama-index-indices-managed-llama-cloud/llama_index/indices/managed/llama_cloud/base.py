@@ -676,8 +676,13 @@ class LlamaCloudIndex(BaseManagedIndex):
 
         return index
 
-    def as_retriever(self, **kwargs: Any) -> BaseRetriever:
-        """Return a Retriever for this managed index."""
+    def as_retriever(self, http2: bool = False, **kwargs: Any) -> BaseRetriever:
+        """
+        Return a Retriever for this managed index.
+
+        Set `http2=True` (requires the `h2` package) to fetch page images over
+        HTTP/2 when the index was not given its own httpx clients.
+        """
         from llama_index.indices.managed.llama_cloud.retriever import (
             LlamaCloudRetriever,
         )
@@ -698,6 +703,7 @@ class LlamaCloudIndex(BaseManagedIndex):
             dense_similarity_top_k=dense_similarity_top_k,
             httpx_client=self._httpx_client,
             async_httpx_client=self._async_httpx_client,
+            http2=http2,
             **kwargs,
         )
 
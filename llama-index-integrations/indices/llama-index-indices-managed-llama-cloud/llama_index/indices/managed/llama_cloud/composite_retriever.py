@@ -19,6 +19,8 @@ from llama_index.core.ingestion.api_utils import get_aclient, get_client
 from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
 from llama_index.indices.managed.llama_cloud.base import LlamaCloudIndex
 from llama_index.indices.managed.llama_cloud.api_utils import (
+    default_async_httpx_client,
+    default_httpx_client,
     resolve_project,
     resolve_retriever,
     page_screenshot_nodes_to_node_with_score,
@@ -49,6 +51,8 @@ class LlamaCloudCompositeRetriever(BaseRetriever):
         timeout: int = 60,
         httpx_client: Optional[httpx.Client] = None,
         async_httpx_client: Optional[httpx.AsyncClient] = None,
+        # only used for the default clients, when no httpx client is passed in
+        http2: bool = False,
         # composite retrieval params
         mode: Optional[CompositeRetrievalMode] = None,
         rerank_top_n: Optional[int] = None,
@@ -58,9 +62,20 @@ class LlamaCloudCompositeRetriever(BaseRetriever):
     ) -> None:
         """Initialize the Composite Retriever."""
         # initialize clients
-        self._client = get_client(api_key, base_url, app_url, timeout, httpx_client)
+        # default clients keep idle connections longer, so later queries reuse them
+        self._client = get_client(
+            api_key,
+            base_url,
+            app_url,
+            timeout,
+            httpx_client or default_httpx_client(timeout, http2=http2),
+        )
         self._aclient = get_aclient(
-            api_key, base_url, app_url, timeout, async_httpx_client
+            api_key,
+            base_url,
+            app_url,
+            timeout,
+            async_httpx_client or default_async_httpx_client(timeout, http2=http2),
         )
 
         self.project = resolve_project(
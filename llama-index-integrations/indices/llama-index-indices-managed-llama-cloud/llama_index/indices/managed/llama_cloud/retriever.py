@@ -14,6 +14,8 @@ from llama_index.core.ingestion.api_utils import get_aclient, get_client
 from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
 from llama_index.core.vector_stores.types import MetadataFilters
 from llama_index.indices.managed.llama_cloud.api_utils import (
+    default_async_httpx_client,
+    default_httpx_client,
     resolve_project_and_pipeline,
     page_screenshot_nodes_to_node_with_score,
     page_figure_nodes_to_node_with_score,
@@ -50,6 +52,8 @@ class LlamaCloudRetriever(BaseRetriever):
         timeout: int = 60,
         httpx_client: Optional[httpx.Client] = None,
         async_httpx_client: Optional[httpx.AsyncClient] = None,
+        # only used for the default clients, when no httpx client is passed in
+        http2: bool = False,
         # retrieval params
         dense_similarity_top_k: Optional[int] = None,
         sparse_similarity_top_k: Optional[int] = None,
@@ -74,9 +78,20 @@ class LlamaCloudRetriever(BaseRetriever):
         # initialize clients
         self._httpx_client = httpx_client
         self._async_httpx_client = async_httpx_client
-        self._client = get_client(api_key, base_url, app_url, timeout, httpx_client)
+        # default clients keep idle connections longer, so later queries reuse them
+        self._client = get_client(
+            api_key,
+            base_url,
+            app_url,
+            timeout,
+            httpx_client or default_httpx_client(timeout, http2=http2),
+        )
         self._aclient = get_aclient(
-            api_key, base_url, app_url, timeout, async_httpx_client
+            api_key,
+            base_url,
+            app_url,
+            timeout,
+            async_httpx_client or default_async_httpx_client(timeout, http2=http2),
         )
 
         pipeline_id = id or index_id or pipeline_id
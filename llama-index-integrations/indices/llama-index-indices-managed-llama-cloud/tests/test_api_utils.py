@@ -0,0 +1,569 @@
+import base64
+import os
+import threading
+import time
+from collections import Counter
+from functools import partial
+from typing import AsyncIterator, Callable, Iterator, List
+
+import httpx
+import pytest
+from llama_cloud.client import AsyncLlamaCloud, LlamaCloud
+from llama_cloud import (
+    PageFigureMetadata,
+    PageFigureNodeWithScore,
+    PageScreenshotMetadata,
+    PageScreenshotNodeWithScore,
+)
+from llama_cloud.core.api_error import ApiError
+
+from llama_index.indices.managed.llama_cloud import api_utils
+from llama_index.indices.managed.llama_cloud.api_utils import (
+    aget_page_figure,
+    aget_page_screenshot,
+    apage_figure_nodes_to_node_with_score,
+    apage_screenshot_nodes_to_node_with_score,
+    get_page_figure,
+    get_page_screenshot,
+    is_retryable_http_error,
+    page_figure_nodes_to_node_with_score,
+    page_screenshot_nodes_to_node_with_score,
+    resolve_project_and_pipeline,
+    retry_on_failure,
+)
+
+Handler = Callable[[httpx.Request], httpx.Response]
+
+
+def _client(handler: Handler) -> LlamaCloud:
+    return LlamaCloud(
+        token="token",
+        base_url="http://llama-cloud.test",
+        httpx_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+
+
+def _aclient(handler: Handler) -> AsyncLlamaCloud:
+    return AsyncLlamaCloud(
+        token="token",
+        base_url="http://llama-cloud.test",
+        httpx_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+
+@pytest.fixture(autouse=True)
+def retry_budget(monkeypatch: pytest.MonkeyPatch) -> api_utils._RetryBudget:
+    budget = api_utils._RetryBudget(capacity=50, refill_rate=5)
+    monkeypatch.setattr(api_utils, "_retry_budget", budget)
+    return budget
+
+
+@pytest.fixture(autouse=True)
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    recorded: List[float] = []
+
+    async def fake_asleep(delay: float) -> None:
+        recorded.append(delay)
+
+    monkeypatch.setattr(api_utils.time, "sleep", recorded.append)
+    monkeypatch.setattr(api_utils.asyncio, "sleep", fake_asleep)
+    return recorded
+
+
+def test_retry_after_header_is_honored(sleeps: List[float]) -> None:
+    responses = iter(
+        [
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(503, headers={"Retry-After": "3"}),
+            httpx.Response(200, content=b"image"),
+        ]
+    )
+    client = _client(lambda request: next(responses))
+
+    assert get_page_screenshot(client, "file", 0, "project") == "aW1hZ2U="
+    assert sleeps == [0.0, 3.0]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_header_is_honored_async(sleeps: List[float]) -> None:
+    responses = iter(
+        [
+            httpx.Response(429, headers={"Retry-After": "1"}),
+            httpx.Response(200, content=b"image"),
+        ]
+    )
+    client = _aclient(lambda request: next(responses))
+
+    assert await aget_page_figure(client, "file", 0, "fig", "project") == "aW1hZ2U="
+    assert sleeps == [1.0]
+
+
+def test_rate_limit_without_retry_after_waits_at_least_minimum(
+    sleeps: List[float],
+) -> None:
+    responses = iter([httpx.Response(429), httpx.Response(200, content=b"image")])
+    client = _client(lambda request: next(responses))
+
+    get_page_screenshot(client, "file", 0, "project")
+    assert len(sleeps) == 1
+    assert sleeps[0] >= api_utils._RATE_LIMIT_MIN_WAIT
+
+
+def test_retry_budget_runs_out_and_refills() -> None:
+    budget = api_utils._RetryBudget(capacity=2, refill_rate=1)
+
+    assert budget.try_acquire()
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+
+    # pretend a second has passed
+    budget._last_refill -= 1
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+
+
+def test_exhausted_retry_budget_stops_retrying(
+    retry_budget: api_utils._RetryBudget,
+) -> None:
+    retry_budget._tokens = 1
+    retry_budget._refill_rate = 0
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(500)
+
+    with pytest.raises(ApiError):
+        get_page_screenshot(_client(handler), "file", 0, "project")
+    assert len(calls) == 2
+
+
+def test_is_retryable_http_error_does_not_spend_budget(
+    retry_budget: api_utils._RetryBudget,
+) -> None:
+    error = ApiError(status_code=503, body="")
+    for _ in range(100):
+        assert is_retryable_http_error(error)
+    assert retry_budget.try_acquire()
+    assert not is_retryable_http_error(ApiError(status_code=404, body=""))
+
+
+def test_page_figure_url_escapes_reserved_characters() -> None:
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, content=b"figure")
+
+    client = _client(handler)
+    assert get_page_figure(client, "file/1", 2, "fig 1#?.png", "project")
+
+    url = requests[0].url
+    assert url.raw_path == (
+        b"/api/v1/files/file%2F1/page-figures/2/fig%201%23%3F.png?project_id=project"
+    )
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 4, 65535, 65536, 200_001])
+@pytest.mark.parametrize("chunk_size", [1, 5, 7, 64])
+def test_base64_stream_encoder_round_trip(size: int, chunk_size: int) -> None:
+    data = os.urandom(size)
+    encoder = api_utils._Base64StreamEncoder()
+    for i in range(0, size, chunk_size):
+        encoder.update(data[i : i + chunk_size])
+
+    assert encoder.finalize() == base64.b64encode(data).decode("ascii")
+
+
+def test_get_page_screenshot_streams_base64() -> None:
+    data = os.urandom(200_001)
+
+    def chunks() -> Iterator[bytes]:
+        for i in range(0, len(data), 10_007):
+            yield data[i : i + 10_007]
+
+    client = _client(lambda request: httpx.Response(200, content=chunks()))
+
+    image = get_page_screenshot(client, "file", 0, "project")
+    assert base64.b64decode(image) == data
+
+
+@pytest.mark.asyncio
+async def test_aget_page_screenshot_streams_base64() -> None:
+    data = os.urandom(100_000)
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for i in range(0, len(data), 4_097):
+            yield data[i : i + 4_097]
+
+    client = _aclient(lambda request: httpx.Response(200, content=chunks()))
+
+    image = await aget_page_screenshot(client, "file", 0, "project")
+    assert base64.b64decode(image) == data
+
+
+class _EchoPath:
+    """Answers every request with its own path and counts requests per path."""
+
+    def __init__(self) -> None:
+        self.calls: Counter = Counter()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls[request.url.path] += 1
+        return httpx.Response(200, content=request.url.path.encode())
+
+
+def _screenshot_nodes() -> List[PageScreenshotNodeWithScore]:
+    pages = [("a", 0), ("b", 1), ("a", 0), ("a", 2), ("b", 1)]
+    return [
+        PageScreenshotNodeWithScore(
+            node=PageScreenshotMetadata(
+                file_id=file_id,
+                page_index=page_index,
+                image_size=1,
+                metadata={"rank": rank},
+            ),
+            score=1.0 / (rank + 1),
+        )
+        for rank, (file_id, page_index) in enumerate(pages)
+    ]
+
+
+def _figure_nodes() -> List[PageFigureNodeWithScore]:
+    figures = [("a", 0, "x"), ("a", 0, "y"), ("a", 0, "x"), ("b", 3, "x")]
+    return [
+        PageFigureNodeWithScore(
+            node=PageFigureMetadata(
+                file_id=file_id,
+                page_index=page_index,
+                figure_name=figure_name,
+                figure_size=1,
+                confidence=1.0,
+                metadata=None,
+            ),
+            score=1.0 / (rank + 1),
+        )
+        for rank, (file_id, page_index, figure_name) in enumerate(figures)
+    ]
+
+
+def _decoded_images(nodes) -> List[str]:
+    return [base64.b64decode(node.node.image).decode() for node in nodes]
+
+
+def _check_screenshot_results(results, handler: _EchoPath) -> None:
+    raw_nodes = _screenshot_nodes()
+    assert _decoded_images(results) == [
+        f"/api/v1/files/{raw.node.file_id}/page_screenshots/{raw.node.page_index}"
+        for raw in raw_nodes
+    ]
+    assert [result.score for result in results] == [raw.score for raw in raw_nodes]
+    assert [result.node.metadata for result in results] == [
+        {"rank": rank, "file_id": raw.node.file_id, "page_index": raw.node.page_index}
+        for rank, raw in enumerate(raw_nodes)
+    ]
+    assert sorted(handler.calls.values()) == [1, 1, 1]
+
+
+def _check_figure_results(results, handler: _EchoPath) -> None:
+    raw_nodes = _figure_nodes()
+    assert _decoded_images(results) == [
+        f"/api/v1/files/{raw.node.file_id}/page-figures/{raw.node.page_index}/"
+        f"{raw.node.figure_name}"
+        for raw in raw_nodes
+    ]
+    assert [result.score for result in results] == [raw.score for raw in raw_nodes]
+    assert [result.node.metadata["figure_name"] for result in results] == [
+        "x",
+        "y",
+        "x",
+        "x",
+    ]
+    assert sorted(handler.calls.values()) == [1, 1, 1]
+
+
+def test_page_screenshot_nodes_fetch_each_page_once() -> None:
+    handler = _EchoPath()
+    results = page_screenshot_nodes_to_node_with_score(
+        _client(handler), _screenshot_nodes(), "project"
+    )
+    _check_screenshot_results(results, handler)
+
+
+def test_page_figure_nodes_fetch_each_figure_once() -> None:
+    handler = _EchoPath()
+    results = page_figure_nodes_to_node_with_score(
+        _client(handler), _figure_nodes(), "project"
+    )
+    _check_figure_results(results, handler)
+
+
+@pytest.mark.asyncio
+async def test_apage_screenshot_nodes_fetch_each_page_once() -> None:
+    handler = _EchoPath()
+    results = await apage_screenshot_nodes_to_node_with_score(
+        _aclient(handler), _screenshot_nodes(), "project"
+    )
+    _check_screenshot_results(results, handler)
+
+
+@pytest.mark.asyncio
+async def test_apage_figure_nodes_fetch_each_figure_once() -> None:
+    handler = _EchoPath()
+    results = await apage_figure_nodes_to_node_with_score(
+        _aclient(handler), _figure_nodes(), "project"
+    )
+    _check_figure_results(results, handler)
+
+
+class _Status:
+    """Answers every request with a fixed status and records each attempt."""
+
+    def __init__(self, status_code: int) -> None:
+        self.status_code = status_code
+        self.calls = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        return httpx.Response(self.status_code, content=f"{self.calls}".encode())
+
+
+@pytest.mark.parametrize(
+    ("status_code", "attempts"), [(500, 5), (503, 5), (429, 5), (404, 1), (400, 1)]
+)
+def test_retry_attempts_by_status(
+    status_code: int, attempts: int, sleeps: List[float]
+) -> None:
+    handler = _Status(status_code)
+
+    with pytest.raises(ApiError) as exc_info:
+        get_page_screenshot(_client(handler), "file", 0, "project")
+
+    assert handler.calls == attempts
+    assert len(sleeps) == attempts - 1
+    # the error from the final attempt is the one that surfaces
+    assert exc_info.value.status_code == status_code
+    assert exc_info.value.body == str(attempts)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("status_code", "attempts"), [(502, 5), (429, 5), (404, 1)])
+async def test_retry_attempts_by_status_async(
+    status_code: int, attempts: int, sleeps: List[float]
+) -> None:
+    handler = _Status(status_code)
+
+    with pytest.raises(ApiError) as exc_info:
+        await aget_page_screenshot(_aclient(handler), "file", 0, "project")
+
+    assert handler.calls == attempts
+    assert len(sleeps) == attempts - 1
+    assert exc_info.value.body == str(attempts)
+
+
+def test_retry_recovers_before_attempts_run_out() -> None:
+    responses = iter([httpx.Response(500)] * 4 + [httpx.Response(200, content=b"ok")])
+    client = _client(lambda request: next(responses))
+
+    assert get_page_screenshot(client, "file", 0, "project") == "b2s="
+
+
+def test_non_http_errors_are_not_retried(sleeps: List[float]) -> None:
+    calls = []
+
+    @retry_on_failure
+    def flaky() -> None:
+        calls.append(None)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        flaky()
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+@pytest.mark.asyncio
+async def test_non_http_errors_are_not_retried_async(sleeps: List[float]) -> None:
+    calls = []
+
+    @retry_on_failure
+    async def flaky() -> None:
+        calls.append(None)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        await flaky()
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_transport_errors_are_not_retried() -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        raise httpx.ConnectError("unreachable", request=request)
+
+    with pytest.raises(httpx.ConnectError):
+        get_page_screenshot(_client(handler), "file", 0, "project")
+    assert len(calls) == 1
+
+
+def _project_and_pipeline_handler(
+    given_project_status: int, calls: List[str]
+) -> Handler:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path == "/api/v1/pipelines/pipeline":
+            return httpx.Response(
+                200,
+                json={
+                    "id": "pipeline",
+                    "name": "index",
+                    "project_id": "project",
+                    "embedding_config": {"type": "OPENAI_EMBEDDING", "component": {}},
+                },
+            )
+        project_id = request.url.path.rsplit("/", 1)[-1]
+        if project_id == "given" and given_project_status != 200:
+            return httpx.Response(given_project_status, json={"detail": "nope"})
+        return httpx.Response(
+            200, json={"id": project_id, "name": project_id, "organization_id": "org"}
+        )
+
+    return handler
+
+
+def test_resolve_project_and_pipeline_uses_matching_project_id() -> None:
+    calls: List[str] = []
+    client = _client(_project_and_pipeline_handler(200, calls))
+
+    project, pipeline = resolve_project_and_pipeline(
+        client, None, "pipeline", None, "project", None
+    )
+
+    assert (project.id, pipeline.id) == ("project", "pipeline")
+    assert sorted(calls) == ["/api/v1/pipelines/pipeline", "/api/v1/projects/project"]
+
+
+@pytest.mark.parametrize("given_project_status", [200, 403, 404, 422, 500])
+def test_resolve_project_and_pipeline_falls_back_to_pipeline_project(
+    given_project_status: int,
+) -> None:
+    calls: List[str] = []
+    client = _client(_project_and_pipeline_handler(given_project_status, calls))
+
+    project, pipeline = resolve_project_and_pipeline(
+        client, None, "pipeline", None, "given", None
+    )
+
+    assert project.id == pipeline.project_id == "project"
+    assert calls[-1] == "/api/v1/projects/project"
+
+
+def test_run_threaded_jobs_returns_results_in_order() -> None:
+    def job(value: int) -> int:
+        time.sleep(0.01 * (5 - value))
+        return value
+
+    jobs = [partial(job, value) for value in range(5)]
+    assert api_utils._run_threaded_jobs(jobs) == [0, 1, 2, 3, 4]
+
+
+def test_run_threaded_jobs_skips_queued_jobs_after_a_failure() -> None:
+    calls = []
+
+    def fail() -> None:
+        calls.append("fail")
+        raise ValueError("boom")
+
+    def never() -> None:
+        calls.append("never")
+
+    with pytest.raises(ValueError, match="boom"):
+        api_utils._run_threaded_jobs([fail, never], workers=1)
+    assert calls == ["fail"]
+
+
+def test_run_threaded_jobs_stops_retries_of_running_fetches() -> None:
+    calls: Counter = Counter()
+    busy_started = threading.Event()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        file_id = request.url.path.split("/")[4]
+        calls[file_id] += 1
+        if file_id == "busy":
+            busy_started.set()
+            return httpx.Response(503, headers={"Retry-After": "30"})
+        busy_started.wait(5)
+        return httpx.Response(404)
+
+    client = _client(handler)
+    jobs = [
+        partial(get_page_screenshot, client, file_id, 0, "project")
+        for file_id in ("busy", "missing")
+    ]
+
+    started = time.monotonic()
+    with pytest.raises(ApiError) as exc_info:
+        api_utils._run_threaded_jobs(jobs)
+
+    assert exc_info.value.status_code == 404
+    assert time.monotonic() - started < 5
+    assert calls == {"busy": 1, "missing": 1}
+
+
+class _ErrorBodyStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """A large error body that records how much of it was read and if it was closed."""
+
+    # an invalid UTF-8 byte up front, then ten times the error body limit
+    data = b"\xff" + b"x" * (10 * api_utils._MAX_ERROR_BODY_SIZE)
+    chunk_size = 1000
+
+    def __init__(self) -> None:
+        self.chunks_read = 0
+        self.closed = False
+
+    def _chunks(self) -> Iterator[bytes]:
+        for i in range(0, len(self.data), self.chunk_size):
+            self.chunks_read += 1
+            yield self.data[i : i + self.chunk_size]
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._chunks()
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for chunk in self._chunks():
+            yield chunk
+
+    def close(self) -> None:
+        self.closed = True
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def _check_bounded_error_body(error: ApiError, stream: _ErrorBodyStream) -> None:
+    assert error.status_code == 404
+    assert error.body == "\ufffd" + "x" * (api_utils._MAX_ERROR_BODY_SIZE - 1)
+    assert stream.chunks_read * stream.chunk_size < len(stream.data)
+    assert stream.closed
+
+
+def test_error_body_is_bounded() -> None:
+    stream = _ErrorBodyStream()
+    client = _client(lambda request: httpx.Response(404, stream=stream))
+
+    with pytest.raises(ApiError) as exc_info:
+        get_page_screenshot(client, "file", 0, "project")
+    _check_bounded_error_body(exc_info.value, stream)
+
+
+@pytest.mark.asyncio
+async def test_error_body_is_bounded_async() -> None:
+    stream = _ErrorBodyStream()
+    client = _aclient(lambda request: httpx.Response(404, stream=stream))
+
+    with pytest.raises(ApiError) as exc_info:
+        await aget_page_figure(client, "file", 0, "fig", "project")
+    _check_bounded_error_body(exc_info.value, stream)
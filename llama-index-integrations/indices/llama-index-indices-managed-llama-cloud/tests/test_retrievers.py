@@ -0,0 +1,138 @@
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+from llama_cloud import Pipeline, Project
+
+from llama_index.indices.managed.llama_cloud import base, composite_retriever, retriever
+from llama_index.indices.managed.llama_cloud.api_utils import (
+    default_async_httpx_client,
+    default_httpx_client,
+)
+from llama_index.indices.managed.llama_cloud.composite_retriever import (
+    LlamaCloudCompositeRetriever,
+)
+from llama_index.indices.managed.llama_cloud.retriever import LlamaCloudRetriever
+
+BASE_URL = "http://llama-cloud.test"
+
+PROJECT = {"id": "project", "name": "Default", "organization_id": "org"}
+PIPELINE = {
+    "id": "pipeline",
+    "name": "index",
+    "project_id": "project",
+    "embedding_config": {"type": "OPENAI_EMBEDDING", "component": {}},
+}
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/api/v1/pipelines/pipeline":
+        return httpx.Response(200, json=PIPELINE)
+    return httpx.Response(200, json=PROJECT)
+
+
+def _transport() -> httpx.MockTransport:
+    return httpx.MockTransport(_handler)
+
+
+@pytest.fixture()
+def default_clients(monkeypatch: pytest.MonkeyPatch) -> List[Dict[str, Any]]:
+    """Record the arguments of every default client built by the retrievers."""
+    calls: List[Dict[str, Any]] = []
+
+    def fake_default_httpx_client(timeout: Any, http2: bool = False) -> httpx.Client:
+        calls.append({"async": False, "timeout": timeout, "http2": http2})
+        return httpx.Client(transport=_transport())
+
+    def fake_default_async_httpx_client(
+        timeout: Any, http2: bool = False
+    ) -> httpx.AsyncClient:
+        calls.append({"async": True, "timeout": timeout, "http2": http2})
+        return httpx.AsyncClient(transport=_transport())
+
+    for module in (retriever, composite_retriever):
+        monkeypatch.setattr(module, "default_httpx_client", fake_default_httpx_client)
+        monkeypatch.setattr(
+            module, "default_async_httpx_client", fake_default_async_httpx_client
+        )
+    return calls
+
+
+@pytest.mark.parametrize("http2", [False, True])
+def test_retriever_passes_http2_to_default_clients(
+    default_clients: List[Dict[str, Any]], http2: bool
+) -> None:
+    LlamaCloudRetriever(
+        pipeline_id="pipeline",
+        project_id="project",
+        api_key="key",
+        base_url=BASE_URL,
+        timeout=30,
+        http2=http2,
+    )
+
+    assert default_clients == [
+        {"async": False, "timeout": 30, "http2": http2},
+        {"async": True, "timeout": 30, "http2": http2},
+    ]
+
+
+def test_composite_retriever_passes_http2_to_default_clients(
+    default_clients: List[Dict[str, Any]],
+) -> None:
+    LlamaCloudCompositeRetriever(
+        name="retriever",
+        project_id="project",
+        api_key="key",
+        base_url=BASE_URL,
+        persisted=False,
+        http2=True,
+    )
+
+    assert [call["http2"] for call in default_clients] == [True, True]
+
+
+def test_index_as_retriever_passes_http2(
+    default_clients: List[Dict[str, Any]], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(
+        base,
+        "resolve_project_and_pipeline",
+        lambda *args: (Project.parse_obj(PROJECT), Pipeline.parse_obj(PIPELINE)),
+    )
+    index = base.LlamaCloudIndex(
+        pipeline_id="pipeline", api_key="key", base_url=BASE_URL
+    )
+
+    index.as_retriever(http2=True)
+
+    assert [call["http2"] for call in default_clients] == [True, True]
+
+
+def test_retriever_uses_default_clients_only_without_httpx_clients(
+    default_clients: List[Dict[str, Any]],
+) -> None:
+    httpx_client = httpx.Client(transport=_transport())
+    async_httpx_client = httpx.AsyncClient(transport=_transport())
+
+    given = LlamaCloudRetriever(
+        pipeline_id="pipeline",
+        api_key="key",
+        base_url=BASE_URL,
+        httpx_client=httpx_client,
+        async_httpx_client=async_httpx_client,
+    )
+    assert default_clients == []
+    assert given._client._client_wrapper.httpx_client is httpx_client
+    assert given._aclient._client_wrapper.httpx_client is async_httpx_client
+
+    LlamaCloudRetriever(pipeline_id="pipeline", api_key="key", base_url=BASE_URL)
+    assert [call["async"] for call in default_clients] == [False, True]
+
+
+def test_default_clients_keep_idle_connections_alive() -> None:
+    for client in (default_httpx_client(), default_async_httpx_client()):
+        pool = client._transport._pool
+        assert pool._keepalive_expiry == 30.0
+        assert pool._max_connections == 100
+        assert pool._max_keepalive_connections == 20